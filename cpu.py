@@ -1,6 +1,8 @@
 """CPU functionality."""
 
+import re
 import sys
+from array import array
 
 HALT = 0b00000001
 LDI = 0b10000010
@@ -24,75 +26,181 @@ SHL = 0b10101100
 SHR = 0b10101101
 MOD = 0b10100100
 
-SP = 7
-
-
-class ALU:
-    """ALU class."""
-
-    def __init__(self, parent_cpu):
-        self.cpu = parent_cpu
-        self.branchtable = {}
-        self.add_branch(AND, self.and_op)
-        self.add_branch(XOR, self.xor)
-        self.add_branch(OR, self.or_op)
-        self.add_branch(NOT, self.not_op)
-        self.add_branch(SHL, self.shl)
-        self.add_branch(SHR, self.shr)
-        self.add_branch(MOD, self.mod)
-        self.add_branch(MULT, self.mult)
-        self.add_branch(ADD, self.add)
-        self.add_branch(CMP, self.cmp_op)
-
-    def add_branch(self, opcode, handler):
-        self.branchtable[opcode] = handler
-
-    def mod(self, reg_a, reg_b):
-        num = self.cpu.reg[reg_b]
-        if num == 0:
-            raise Exception("Unsupported ALU operation - division by zero")
-        else:
-            self.cpu.reg[reg_a] = self.cpu.reg[reg_a] % num
+# Synthetic super-opcodes installed by the post-load fusion pass. The values
+# are unused by the LS-8 spec; each fused handler advances pc over both
+# original instructions itself.
+LDI_LDI = 0b00011100
+CMP_JEQ = 0b00011101
+CMP_JNE = 0b00011110
+PUSH_PUSH = 0b00011111
+
+# Opcode patched over the head of a hot loop once its backward branch has
+# been taken TRACE_THRESHOLD times; its handler runs the compiled trace for
+# that address, paying dispatch once per loop iteration instead of per
+# instruction.
+TRACE = 0b00011011
+TRACE_THRESHOLD = 50
 
-    def shl(self, reg_a, reg_b):
-        self.cpu.reg[reg_a] = self.cpu.reg[reg_a] << self.cpu.reg[reg_b]
+SP = 7
 
-    def shr(self, reg_a, reg_b):
-        self.cpu.reg[reg_a] = self.cpu.reg[reg_a] >> self.cpu.reg[reg_b]
+# The CPU keeps registers, pc, and fl in one contiguous unsigned-int buffer
+# (self.state): slots 0..7 are the registers, with pc and fl in the two
+# slots after them, so the whole machine state shares one allocation.
+PC = 8
+FL = 9
 
-    def not_op(self, reg_a, reg_b):
-        self.cpu.reg[reg_a] = ~self.cpu.reg[reg_a] & ((1 << 8) - 1)
+# Conditional-jump condition tables, indexed by the three flag bits:
+# _TAKE_EQ[fl & 7] is 1 exactly when the equal bit is set. Future JLT/JGT
+# opcodes extend the same scheme with tables keyed on their own flag bits.
+_TAKE_EQ = bytes(fl & 1 for fl in range(8))
+_TAKE_NE = bytes((fl & 1) ^ 1 for fl in range(8))
 
-    def or_op(self, reg_a, reg_b):
-        self.cpu.reg[reg_a] = self.cpu.reg[reg_a] | self.cpu.reg[reg_b]
+# Per-opcode stride table (operand count + 1), precomputed for all 256
+# opcode values. The run loop no longer needs it -- handlers return their
+# own pc delta -- but the load-time passes still walk the program with it.
+_INCR = bytes((op >> 6 & 0b11) + 1 for op in range(256))
 
-    def xor(self, reg_a, reg_b):
-        self.cpu.reg[reg_a] = self.cpu.reg[reg_a] ^ self.cpu.reg[reg_b]
 
-    def and_op(self, reg_a, reg_b):
-        self.cpu.reg[reg_a] = self.cpu.reg[reg_a] & self.cpu.reg[reg_b]
+class _Halt(Exception):
+    """Raised by the HALT handler to unwind out of the run loop."""
 
-    def add(self, reg_a, reg_b):
-        self.cpu.reg[reg_a] += self.cpu.reg[reg_b]
+try:
+    from cpu_core import run_core as _cpu_core_run
+except ImportError:
+    _cpu_core_run = None
 
-    def mult(self, reg_a, reg_b):
-        self.cpu.reg[reg_a] *= self.cpu.reg[reg_b]
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
-    def cmp_op(self, reg_a, reg_b):
-        num1 = self.cpu.reg[reg_a]
-        num2 = self.cpu.reg[reg_b]
-        if num1 == num2:
-            self.cpu.fl = 0b00000001
-        elif num1 < num2:
-            self.cpu.fl = 0b00000100
-        elif num1 > num2:
-            self.cpu.fl = 0b00000010
+if njit is not None:
+    @njit(cache=True)
+    def _run_core(ram, reg):
+        """JIT-compiled interpreter loop over the raw ram/reg buffers.
 
-    def run(self, opcode, reg_a, reg_b):
-        if opcode in self.branchtable:
-            return self.branchtable[opcode](reg_a, reg_b)
-        else:
-            raise Exception("Unsupported ALU operation")
+        Mirrors CPU.run's dispatch as an if/elif ladder that LLVM lowers
+        to a jump table, keeping pc and fl in machine registers.
+        """
+        pc = 0
+        fl = 0
+        while True:
+            cmd = ram[pc]
+            if cmd == HALT:
+                return
+            elif cmd == LDI:
+                reg[ram[pc + 1]] = ram[pc + 2]
+                pc += 3
+            elif cmd == PRN:
+                print(reg[ram[pc + 1]])
+                pc += 2
+            elif cmd == NOP:
+                pc += 1
+            elif cmd == ADD:
+                reg_a = ram[pc + 1]
+                reg[reg_a] = (reg[reg_a] + reg[ram[pc + 2]]) & 0xFF
+                pc += 3
+            elif cmd == MULT:
+                reg_a = ram[pc + 1]
+                reg[reg_a] = (reg[reg_a] * reg[ram[pc + 2]]) & 0xFF
+                pc += 3
+            elif cmd == CMP:
+                num1 = reg[ram[pc + 1]]
+                num2 = reg[ram[pc + 2]]
+                fl = ((num1 == num2)
+                      | (num1 > num2) << 1
+                      | (num1 < num2) << 2)
+                pc += 3
+            elif cmd == AND:
+                reg[ram[pc + 1]] &= reg[ram[pc + 2]]
+                pc += 3
+            elif cmd == OR:
+                reg[ram[pc + 1]] |= reg[ram[pc + 2]]
+                pc += 3
+            elif cmd == XOR:
+                reg[ram[pc + 1]] ^= reg[ram[pc + 2]]
+                pc += 3
+            elif cmd == NOT:
+                reg_a = ram[pc + 1]
+                reg[reg_a] = ~reg[reg_a] & 0xFF
+                pc += 2
+            elif cmd == SHL:
+                reg_a = ram[pc + 1]
+                reg[reg_a] = (reg[reg_a] << reg[ram[pc + 2]]) & 0xFF
+                pc += 3
+            elif cmd == SHR:
+                reg[ram[pc + 1]] >>= reg[ram[pc + 2]]
+                pc += 3
+            elif cmd == MOD:
+                reg_a = ram[pc + 1]
+                num = reg[ram[pc + 2]]
+                if num == 0:
+                    raise Exception(
+                        "Unsupported ALU operation - division by zero")
+                reg[reg_a] = reg[reg_a] % num
+                pc += 3
+            elif cmd == PUSH:
+                reg[SP] -= 1
+                ram[reg[SP]] = reg[ram[pc + 1]]
+                pc += 2
+            elif cmd == POP:
+                reg[ram[pc + 1]] = ram[reg[SP]]
+                reg[SP] += 1
+                pc += 2
+            elif cmd == CALL:
+                reg[SP] -= 1
+                ram[reg[SP]] = pc + 2
+                pc = reg[ram[pc + 1]]
+            elif cmd == RET:
+                pc = ram[reg[SP]]
+                reg[SP] += 1
+            elif cmd == JMP:
+                pc = reg[ram[pc + 1]]
+            elif cmd == JEQ:
+                if fl & 1:
+                    pc = reg[ram[pc + 1]]
+                else:
+                    pc += 2
+            elif cmd == JNE:
+                if not fl & 1:
+                    pc = reg[ram[pc + 1]]
+                else:
+                    pc += 2
+            elif cmd == LDI_LDI:
+                reg[ram[pc + 1]] = ram[pc + 2]
+                reg[ram[pc + 4]] = ram[pc + 5]
+                pc += 6
+            elif cmd == PUSH_PUSH:
+                reg[SP] -= 1
+                ram[reg[SP]] = reg[ram[pc + 1]]
+                reg[SP] -= 1
+                ram[reg[SP]] = reg[ram[pc + 3]]
+                pc += 4
+            elif cmd == CMP_JEQ:
+                num1 = reg[ram[pc + 1]]
+                num2 = reg[ram[pc + 2]]
+                fl = ((num1 == num2)
+                      | (num1 > num2) << 1
+                      | (num1 < num2) << 2)
+                if fl & 1:
+                    pc = reg[ram[pc + 4]]
+                else:
+                    pc += 5
+            elif cmd == CMP_JNE:
+                num1 = reg[ram[pc + 1]]
+                num2 = reg[ram[pc + 2]]
+                fl = ((num1 == num2)
+                      | (num1 > num2) << 1
+                      | (num1 < num2) << 2)
+                if not fl & 1:
+                    pc = reg[ram[pc + 4]]
+                else:
+                    pc += 5
+            else:
+                print(cmd)
+                raise Exception("Unknown instruction")
+else:
+    _run_core = None
 
 
 class CPU:
@@ -100,106 +208,495 @@ class CPU:
 
     def __init__(self):
         """Construct a new CPU."""
-        self.reg = [0] * 8
-        self.reg[SP] = 0xF4
-        self.ram = [0] * 256
-        self.pc = 0
-        self.fl = 0
-        self.branchtable = {}
-        self.add_branch(HALT, self.halt)
-        self.add_branch(LDI, self.ldi)
-        self.add_branch(PRN, self.prn)
-        self.add_branch(NOP, self.nop)
-        self.add_branch(POP, self.pop)
-        self.add_branch(PUSH, self.push)
-        self.add_branch(CALL, self.call)
-        self.add_branch(RET, self.ret)
-        self.add_branch(JMP, self.jmp)
-        self.add_branch(JEQ, self.jeq)
-        self.add_branch(JNE, self.jne)
-        self.alu_ops = {AND, XOR, OR, NOT, SHL, SHR, MOD, MULT, ADD, CMP}
-        self.alu = ALU(self)
-
-    def add_branch(self, opcode, handler):
-        self.branchtable[opcode] = handler
+        # Typed storage: ram is a flat byte buffer and registers/pc/fl live
+        # together in a C-backed unsigned-int array, so indexing skips the
+        # boxed-int path a plain list would take and every hot-path access
+        # hits the same small buffer.
+        self.state = array('I', [0] * 10)
+        self.state[SP] = 0xF4
+        self.ram = bytearray(256)
+        self.program_len = 0
+        self._compiled = None
+        self.branch_counts = {}
+        self.traces = {}
+        # Flat jump table indexed directly by the 8-bit opcode. Every entry
+        # is a pre-bound zero-argument handler, so dispatching costs a single
+        # indexed load instead of dict/set probes and attribute lookups.
+        # Built as a list, frozen into a tuple below: nothing mutates it
+        # after construction (trace handlers share one pre-registered slot)
+        # and tuple subscripting is the cheapest indexed load CPython has.
+        self.dispatch = [self._illegal] * 256
+        self.dispatch[HALT] = self.halt
+        self.dispatch[LDI] = self.ldi
+        self.dispatch[PRN] = self.prn
+        self.dispatch[NOP] = self.nop
+        self.dispatch[POP] = self.pop
+        self.dispatch[PUSH] = self.push
+        self.dispatch[CALL] = self.call
+        self.dispatch[RET] = self.ret
+        self.dispatch[JMP] = self.jmp
+        self.dispatch[JEQ] = self.jeq
+        self.dispatch[JNE] = self.jne
+        self.dispatch[AND] = self.and_op
+        self.dispatch[XOR] = self.xor
+        self.dispatch[OR] = self.or_op
+        self.dispatch[NOT] = self.not_op
+        self.dispatch[SHL] = self.shl
+        self.dispatch[SHR] = self.shr
+        self.dispatch[MOD] = self.mod
+        self.dispatch[MULT] = self.mult
+        self.dispatch[ADD] = self.add
+        self.dispatch[CMP] = self.cmp_op
+        self.dispatch[TRACE] = self.run_trace
+        self.dispatch[LDI_LDI] = self.ldi_ldi
+        self.dispatch[CMP_JEQ] = self.cmp_jeq
+        self.dispatch[CMP_JNE] = self.cmp_jne
+        self.dispatch[PUSH_PUSH] = self.push_push
+        self.dispatch = tuple(self.dispatch)
+
+    def mod(self):
+        state = self.state
+        pc = state[PC]
+        reg_a = self.ram[pc + 1]
+        num = state[self.ram[pc + 2]]
+        if num == 0:
+            raise Exception("Unsupported ALU operation - division by zero")
+        else:
+            state[reg_a] = state[reg_a] % num
+        return 3
+
+    def shl(self):
+        state = self.state
+        pc = state[PC]
+        reg_a = self.ram[pc + 1]
+        state[reg_a] = (state[reg_a] << state[self.ram[pc + 2]]) & 0xFF
+        return 3
+
+    def shr(self):
+        state = self.state
+        pc = state[PC]
+        state[self.ram[pc + 1]] >>= state[self.ram[pc + 2]]
+        return 3
+
+    def not_op(self):
+        state = self.state
+        reg_a = self.ram[state[PC] + 1]
+        state[reg_a] = ~state[reg_a] & 0xFF
+        return 2
+
+    def or_op(self):
+        state = self.state
+        pc = state[PC]
+        state[self.ram[pc + 1]] |= state[self.ram[pc + 2]]
+        return 3
+
+    def xor(self):
+        state = self.state
+        pc = state[PC]
+        state[self.ram[pc + 1]] ^= state[self.ram[pc + 2]]
+        return 3
+
+    def and_op(self):
+        state = self.state
+        pc = state[PC]
+        state[self.ram[pc + 1]] &= state[self.ram[pc + 2]]
+        return 3
+
+    def add(self):
+        state = self.state
+        pc = state[PC]
+        reg_a = self.ram[pc + 1]
+        state[reg_a] = (state[reg_a] + state[self.ram[pc + 2]]) & 0xFF
+        return 3
+
+    def mult(self):
+        state = self.state
+        pc = state[PC]
+        reg_a = self.ram[pc + 1]
+        state[reg_a] = (state[reg_a] * state[self.ram[pc + 2]]) & 0xFF
+        return 3
+
+    def cmp_op(self):
+        state = self.state
+        pc = state[PC]
+        num1 = state[self.ram[pc + 1]]
+        num2 = state[self.ram[pc + 2]]
+        # Branchless L/G/E update: bools are 0/1, so three compares and two
+        # shifts set the flags without a data-dependent branch.
+        state[FL] = ((num1 == num2)
+                     | (num1 > num2) << 1
+                     | (num1 < num2) << 2)
+        return 3
+
+    def _illegal(self):
+        print(f"Unknown instruction: {self.ram[self.state[PC]]}")
+        sys.exit(1)
 
     def jeq(self):
-        if self.fl == 1:
-            self.jmp()
-        else:
-            self.pc += self.increment(JMP)
+        state = self.state
+        if _TAKE_EQ[state[FL] & 7]:
+            pc = state[PC]
+            target = state[self.ram[pc + 1]]
+            state[PC] = target
+            if target < pc:
+                self._note_backward_jump(target, pc + 2)
+            return 0
+        return 2
 
     def jne(self):
-        if self.fl != 1:
-            self.jmp()
-        else:
-            self.pc += self.increment(JNE)
+        state = self.state
+        if _TAKE_NE[state[FL] & 7]:
+            pc = state[PC]
+            target = state[self.ram[pc + 1]]
+            state[PC] = target
+            if target < pc:
+                self._note_backward_jump(target, pc + 2)
+            return 0
+        return 2
 
     def jmp(self):
-        self.pc = self.reg[self.ram_read(self.pc + 1)]
+        state = self.state
+        pc = state[PC]
+        target = state[self.ram[pc + 1]]
+        state[PC] = target
+        if target < pc:
+            self._note_backward_jump(target, pc + 2)
+        return 0
 
     def call(self):
-        self.reg[SP] -= 1
-        self.ram_write(self.reg[SP], self.pc + 2)
-        num = self.ram_read(self.pc + 1)
-        self.pc = self.reg[num]
+        state = self.state
+        state[SP] -= 1
+        self.ram[state[SP]] = state[PC] + 2
+        state[PC] = state[self.ram[state[PC] + 1]]
+        return 0
 
     def ret(self):
-        self.pc = self.ram_read(self.reg[SP])
-        self.reg[SP] += 1
+        state = self.state
+        state[PC] = self.ram[state[SP]]
+        state[SP] += 1
+        return 0
 
     def pop(self):
-        reg_index = self.ram_read(self.pc + 1)
-        num = self.ram_read(self.reg[SP])
-        self.reg[reg_index] = num
-        self.reg[SP] += 1
+        state = self.state
+        state[self.ram[state[PC] + 1]] = self.ram[state[SP]]
+        state[SP] += 1
+        return 2
 
     def push(self):
-        reg_index = self.ram_read(self.pc + 1)
-        num = self.reg[reg_index]
-        self.reg[SP] -= 1
-        self.ram_write(self.reg[SP], num)
+        state = self.state
+        state[SP] -= 1
+        self.ram[state[SP]] = state[self.ram[state[PC] + 1]]
+        return 2
 
     def halt(self):
-        return True
+        raise _Halt()
 
     def ldi(self):
-        reg_index = self.ram_read(self.pc + 1)
-        num = self.ram_read(self.pc + 2)
-        self.reg[reg_index] = num
+        state = self.state
+        pc = state[PC]
+        state[self.ram[pc + 1]] = self.ram[pc + 2]
+        return 3
 
     def prn(self):
-        reg_index = self.ram_read(self.pc + 1)
-        print(self.reg[reg_index])
+        state = self.state
+        print(state[self.ram[state[PC] + 1]])
+        return 2
 
     def nop(self):
-        pass
-
-    def run_alu(self, opcode):
-        return self.alu.run(opcode, self.ram_read(self.pc + 1),
-                            self.ram_read(self.pc + 2))
+        return 1
+
+    def ldi_ldi(self):
+        ram = self.ram
+        state = self.state
+        pc = state[PC]
+        state[ram[pc + 1]] = ram[pc + 2]
+        state[ram[pc + 4]] = ram[pc + 5]
+        return 6
+
+    def push_push(self):
+        ram = self.ram
+        state = self.state
+        pc = state[PC]
+        state[SP] -= 1
+        ram[state[SP]] = state[ram[pc + 1]]
+        state[SP] -= 1
+        ram[state[SP]] = state[ram[pc + 3]]
+        return 4
+
+    def cmp_jeq(self):
+        ram = self.ram
+        state = self.state
+        pc = state[PC]
+        num1 = state[ram[pc + 1]]
+        num2 = state[ram[pc + 2]]
+        fl = ((num1 == num2)
+              | (num1 > num2) << 1
+              | (num1 < num2) << 2)
+        state[FL] = fl
+        if _TAKE_EQ[fl]:
+            target = state[ram[pc + 4]]
+            state[PC] = target
+            if target < pc:
+                self._note_backward_jump(target, pc + 5)
+            return 0
+        return 5
+
+    def cmp_jne(self):
+        ram = self.ram
+        state = self.state
+        pc = state[PC]
+        num1 = state[ram[pc + 1]]
+        num2 = state[ram[pc + 2]]
+        fl = ((num1 == num2)
+              | (num1 > num2) << 1
+              | (num1 < num2) << 2)
+        state[FL] = fl
+        if _TAKE_NE[fl]:
+            target = state[ram[pc + 4]]
+            state[PC] = target
+            if target < pc:
+                self._note_backward_jump(target, pc + 5)
+            return 0
+        return 5
 
     def load(self, file):
         """Load a program into memory."""
-        address = 0
-        program = []
-
         with open(file) as f:
-            for line in f:
-                line = line.partition('#')[0]
-                line = line.rstrip()
-                if line:
-                    program.append(int(str.encode(line), 2))
-
-        for instruction in program:
-            self.ram[address] = instruction
-            address += 1
+            text = f.read()
+
+        # Strip comments in one pass and bulk-parse the remaining binary
+        # tokens instead of looping line by line.
+        text = re.sub(r'#[^\n]*', '', text)
+        program = [int(token, 2) for token in text.split()]
+
+        self.ram[:len(program)] = bytes(program)
+        self.program_len = len(program)
+        self._compiled = None
+        self.branch_counts = {}
+        self.traces = {}
+        self._fuse(len(program))
+
+    # First opcode of each pair mapped to (second opcode, super-opcode).
+    _FUSABLE = {
+        LDI: {LDI: LDI_LDI},
+        PUSH: {PUSH: PUSH_PUSH},
+        CMP: {JEQ: CMP_JEQ, JNE: CMP_JNE},
+    }
+
+    def _fuse(self, length):
+        """Rewrite common opcode pairs into fused super-opcodes in place.
+
+        Only the first opcode byte of a pair is overwritten; the second
+        instruction's bytes are untouched, so a jump into the middle of a
+        fused pair still executes the original instruction.
+        """
+        ram = self.ram
+        i = 0
+        while i < length:
+            op = ram[i]
+            nxt = i + _INCR[op]
+            second = self._FUSABLE.get(op)
+            if second is not None and nxt < length and ram[nxt] in second:
+                ram[i] = second[ram[nxt]]
+                i = nxt + _INCR[ram[nxt]]
+            else:
+                i = nxt
 
-    def ram_read(self, index):
-        return self.ram[index]
+    def _emit_op(self, addr):
+        """Emit specialized Python statements for the instruction at addr.
 
-    def ram_write(self, index, num):
-        self.ram[index] = num
+        Operand bytes are folded into the generated source as literals, so
+        the compiled code never re-reads them from ram.
+        """
+        ram = self.ram
+        op = ram[addr]
+        a = ram[addr + 1]
+        b = ram[addr + 2]
+        nxt = addr + _INCR[op]
+        cmp_src = (f'fl = (reg[{a}] == reg[{b}])'
+                   f' | (reg[{a}] > reg[{b}]) << 1'
+                   f' | (reg[{a}] < reg[{b}]) << 2')
+        if op == HALT:
+            return ['return']
+        if op == LDI:
+            return [f'reg[{a}] = {b}', f'pc = {nxt}']
+        if op == PRN:
+            return [f'print(reg[{a}])', f'pc = {nxt}']
+        if op == NOP:
+            return [f'pc = {nxt}']
+        if op == ADD:
+            return [f'reg[{a}] = (reg[{a}] + reg[{b}]) & 0xFF', f'pc = {nxt}']
+        if op == MULT:
+            return [f'reg[{a}] = (reg[{a}] * reg[{b}]) & 0xFF', f'pc = {nxt}']
+        if op == AND:
+            return [f'reg[{a}] &= reg[{b}]', f'pc = {nxt}']
+        if op == OR:
+            return [f'reg[{a}] |= reg[{b}]', f'pc = {nxt}']
+        if op == XOR:
+            return [f'reg[{a}] ^= reg[{b}]', f'pc = {nxt}']
+        if op == NOT:
+            return [f'reg[{a}] = ~reg[{a}] & 0xFF', f'pc = {nxt}']
+        if op == SHL:
+            return [f'reg[{a}] = (reg[{a}] << reg[{b}]) & 0xFF',
+                    f'pc = {nxt}']
+        if op == SHR:
+            return [f'reg[{a}] >>= reg[{b}]', f'pc = {nxt}']
+        if op == MOD:
+            return [f'if reg[{b}] == 0:',
+                    '    raise Exception('
+                    '"Unsupported ALU operation - division by zero")',
+                    f'reg[{a}] %= reg[{b}]', f'pc = {nxt}']
+        if op == CMP:
+            return [cmp_src, f'pc = {nxt}']
+        if op == PUSH:
+            return [f'reg[{SP}] -= 1', f'ram[reg[{SP}]] = reg[{a}]',
+                    f'pc = {nxt}']
+        if op == POP:
+            return [f'reg[{a}] = ram[reg[{SP}]]', f'reg[{SP}] += 1',
+                    f'pc = {nxt}']
+        if op == CALL:
+            return [f'reg[{SP}] -= 1', f'ram[reg[{SP}]] = {addr + 2}',
+                    f'pc = reg[{a}]']
+        if op == RET:
+            return [f'pc = ram[reg[{SP}]]', f'reg[{SP}] += 1']
+        if op == JMP:
+            return [f'pc = reg[{a}]']
+        if op == JEQ:
+            return [f'pc = reg[{a}] if fl & 1 else {addr + 2}']
+        if op == JNE:
+            return [f'pc = reg[{a}] if not fl & 1 else {addr + 2}']
+        if op == LDI_LDI:
+            return [f'reg[{a}] = {b}',
+                    f'reg[{ram[addr + 4]}] = {ram[addr + 5]}',
+                    f'pc = {addr + 6}']
+        if op == PUSH_PUSH:
+            return [f'reg[{SP}] -= 1', f'ram[reg[{SP}]] = reg[{a}]',
+                    f'reg[{SP}] -= 1', f'ram[reg[{SP}]] = reg[{ram[addr + 3]}]',
+                    f'pc = {addr + 4}']
+        if op == CMP_JEQ:
+            return [cmp_src,
+                    f'pc = reg[{ram[addr + 4]}] if fl & 1 else {addr + 5}']
+        if op == CMP_JNE:
+            return [cmp_src,
+                    f'pc = reg[{ram[addr + 4]}] if not fl & 1 else {addr + 5}']
+        return [f'raise Exception("Unknown instruction: {op}")']
+
+    def _next_addr(self, addr):
+        op = self.ram[addr]
+        if op == LDI_LDI:
+            return addr + 6
+        if op == PUSH_PUSH:
+            return addr + 4
+        if op in (CMP_JEQ, CMP_JNE):
+            return addr + 5
+        return addr + _INCR[op]
+
+    def _compile_program(self):
+        """Specialize the loaded program into one compiled Python function.
+
+        Generates an if/elif chain keyed on pc with one block per
+        instruction address, compiles it, and returns the function. Dispatch
+        disappears: each block falls through to a statically known successor
+        or assigns pc for jumps. Fused pairs get an extra block for their
+        interior address — _fuse leaves the second instruction's bytes
+        intact and jumps may land there.
+        """
+        lines = ['def _compiled(ram, reg):',
+                 '    pc = 0',
+                 '    fl = 0',
+                 '    while True:']
+        addr = 0
+        branch = 'if'
+        while addr < self.program_len:
+            lines.append(f'        {branch} pc == {addr}:')
+            lines.extend('            ' + stmt for stmt in self._emit_op(addr))
+            branch = 'elif'
+            op = self.ram[addr]
+            if op in (LDI_LDI, CMP_JEQ, CMP_JNE):
+                interior = addr + 3
+            elif op == PUSH_PUSH:
+                interior = addr + 2
+            else:
+                interior = None
+            if interior is not None:
+                lines.append(f'        {branch} pc == {interior}:')
+                lines.extend('            ' + stmt
+                             for stmt in self._emit_op(interior))
+            addr = self._next_addr(addr)
+        lines.append('        else:')
+        lines.append('            raise Exception("Unknown pc: %d" % pc)')
+        namespace = {}
+        exec(compile('\n'.join(lines), '<ls8-compiled>', 'exec'), namespace)
+        return namespace['_compiled']
+
+    def _compile_trace(self, start, end):
+        """Compile the instructions in [start, end) into one closure.
+
+        Same emitter as _compile_program, scoped to a hot loop body: the
+        closure runs from start and keeps going while pc stays inside the
+        region, then writes pc and fl back to the state buffer so the
+        interpreter resumes wherever the loop exited.
+        """
+        lines = ['def _trace(ram, reg):',
+                 f'    pc = {start}',
+                 f'    fl = reg[{FL}]',
+                 '    while True:']
+        addr = start
+        branch = 'if'
+        while addr < end:
+            op = self.ram[addr]
+            lines.append(f'        {branch} pc == {addr}:')
+            if op in (HALT, TRACE):
+                # Bail back to the interpreter: it owns halting, and a
+                # nested TRACE byte hides the original instruction bytes.
+                lines.append('            break')
+                if op == TRACE:
+                    break
+            else:
+                lines.extend('            ' + stmt
+                             for stmt in self._emit_op(addr))
+            addr = self._next_addr(addr)
+            branch = 'elif'
+        lines.append('        else:')
+        lines.append('            break')
+        lines.append(f'    reg[{FL}] = fl')
+        lines.append(f'    reg[{PC}] = pc')
+        namespace = {}
+        exec(compile('\n'.join(lines), '<ls8-trace>', 'exec'), namespace)
+        return namespace['_trace']
+
+    def _note_backward_jump(self, target, end):
+        """Count a taken backward jump; compile its region when it gets hot.
+
+        Called by the jump handlers with the loop head (jump target) and the
+        address just past the jump. At TRACE_THRESHOLD the region is compiled
+        and the loop head's opcode byte is patched to TRACE.
+        """
+        counts = self.branch_counts
+        count = counts.get(target, 0) + 1
+        counts[target] = count
+        if count == TRACE_THRESHOLD and self.ram[target] != TRACE:
+            self.traces[target] = self._compile_trace(target, end)
+            self.ram[target] = TRACE
+
+    def run_trace(self):
+        trace = self.traces.get(self.state[PC])
+        if trace is None:
+            # A program byte that happens to equal TRACE without an
+            # installed trace is just an unknown instruction.
+            return self._illegal()
+        trace(self.ram, self.state)
+        return 0
+
+    def run_compiled(self):
+        """Run the loaded program through its specialized compiled form.
+
+        Alternative to run(): the interpreter stays the default entry
+        point, but this path removes per-instruction dispatch entirely.
+        """
+        if self._compiled is None:
+            self._compiled = self._compile_program()
+        self._compiled(self.ram, self.state)
 
     def trace(self):
         """
@@ -208,37 +705,43 @@ class CPU:
         """
 
         print(f"TRACE: %02X | %02X %02X %02X |" % (
-            self.pc,
-            # self.fl,
+            self.state[PC],
+            # self.state[FL],
             # self.ie,
-            self.ram_read(self.pc),
-            self.ram_read(self.pc + 1),
-            self.ram_read(self.pc + 2)
+            self.ram[self.state[PC]],
+            self.ram[self.state[PC] + 1],
+            self.ram[self.state[PC] + 2]
         ), end='')
 
         for i in range(8):
-            print(" %02X" % self.reg[i], end='')
+            print(" %02X" % self.state[i], end='')
 
         print()
 
-    def sets_pc(self, opcode):
-        return (opcode >> 4 & 1)
-
-    def increment(self, opcode):
-        return (opcode >> 6 & 0b11) + 1
-
     def run(self):
         """Run the CPU."""
-        stop = False
-        self.pc = 0
-        while not stop:
-            command = self.ram_read(self.pc)
-            if command in self.alu_ops:
-                stop = self.run_alu(command)
-            elif command in self.branchtable:
-                stop = self.branchtable[command]()
-            else:
-                print(f"Unknown instruction: {command}")
-                sys.exit(1)
-            if not self.sets_pc(command):
-                self.pc += self.increment(command)
+        if _cpu_core_run is not None:
+            _cpu_core_run(self.ram, self.state)
+            return
+        if _run_core is not None:
+            _run_core(self.ram, self.state)
+            return
+        # Hoist the per-iteration attribute loads out of the loop; handlers
+        # share the state buffer, so the loop and the handlers see the same
+        # pc without any attribute traffic. Every handler returns the pc
+        # delta to apply (0 for jumps that set pc themselves), so the tick
+        # is one dispatch plus one add; HALT raises to end the loop rather
+        # than making every tick test a stop flag.
+        ram = self.ram
+        dispatch = self.dispatch
+        state = self.state
+        state[PC] = 0
+        try:
+            while True:
+                # The delta must be applied after the handler returns (an
+                # augmented assignment would read pc before a jump handler
+                # reassigns it).
+                delta = dispatch[ram[state[PC]]]()
+                state[PC] += delta
+        except _Halt:
+            pass
@@ -0,0 +1,215 @@
+# cython: language_level=3
+"""Direct-threaded interpreter core.
+
+The interpreter proper lives in the verbatim C block below so it can use
+GCC/Clang computed goto: every handler ends with its own indirect jump
+through the label table, giving the branch predictor one jump site per
+opcode instead of a single shared dispatch jump. On compilers without
+computed goto it falls back to a switch loop.
+
+Build in place with: python setup.py build_ext --inplace
+"""
+
+cdef extern from *:
+    """
+    #include <stdio.h>
+
+    /* ls8_run exit statuses, surfaced as Python errors by run_core(). */
+    #define LS8_OK         0
+    #define LS8_ERR_DIV    1
+    #define LS8_ERR_OPCODE 2
+
+    #define OP_NOP  0x00
+    #define OP_HALT 0x01
+    #define OP_RET  0x11
+    #define OP_PUSH 0x45
+    #define OP_POP  0x46
+    #define OP_PRN  0x47
+    #define OP_CALL 0x50
+    #define OP_JMP  0x54
+    #define OP_JEQ  0x55
+    #define OP_JNE  0x56
+    #define OP_NOT  0x69
+    #define OP_LDI  0x82
+    #define OP_ADD  0xA0
+    #define OP_MULT 0xA2
+    #define OP_MOD  0xA4
+    #define OP_CMP  0xA7
+    #define OP_AND  0xA8
+    #define OP_OR   0xAA
+    #define OP_XOR  0xAB
+    #define OP_SHL  0xAC
+    #define OP_SHR  0xAD
+
+    /* Fused super-opcodes installed by CPU._fuse(). */
+    #define OP_LDI_LDI   0x1C
+    #define OP_CMP_JEQ   0x1D
+    #define OP_CMP_JNE   0x1E
+    #define OP_PUSH_PUSH 0x1F
+
+    #if defined(__GNUC__) || defined(__clang__)
+    #define LS8_COMPUTED_GOTO 1
+    #endif
+
+    static int ls8_run(unsigned char *ram, unsigned int *reg)
+    {
+        unsigned int pc = 0, fl = 0, a, b;
+    #ifdef LS8_COMPUTED_GOTO
+        void *labels[256];
+        int i;
+        for (i = 0; i < 256; i++) labels[i] = &&L_illegal;
+        labels[OP_NOP] = &&L_nop;   labels[OP_HALT] = &&L_halt;
+        labels[OP_RET] = &&L_ret;   labels[OP_PUSH] = &&L_push;
+        labels[OP_POP] = &&L_pop;   labels[OP_PRN] = &&L_prn;
+        labels[OP_CALL] = &&L_call; labels[OP_JMP] = &&L_jmp;
+        labels[OP_JEQ] = &&L_jeq;   labels[OP_JNE] = &&L_jne;
+        labels[OP_NOT] = &&L_not;   labels[OP_LDI] = &&L_ldi;
+        labels[OP_ADD] = &&L_add;
+        labels[OP_MULT] = &&L_mult; labels[OP_MOD] = &&L_mod;
+        labels[OP_CMP] = &&L_cmp;   labels[OP_AND] = &&L_and;
+        labels[OP_OR] = &&L_or;     labels[OP_XOR] = &&L_xor;
+        labels[OP_SHL] = &&L_shl;   labels[OP_SHR] = &&L_shr;
+        labels[OP_LDI_LDI] = &&L_ldi2;   labels[OP_CMP_JEQ] = &&L_cmpjeq;
+        labels[OP_CMP_JNE] = &&L_cmpjne; labels[OP_PUSH_PUSH] = &&L_push2;
+
+        #define DISPATCH() goto *labels[ram[pc]]
+        DISPATCH();
+    L_halt: return LS8_OK;
+    L_nop:  pc += 1; DISPATCH();
+    L_ldi:
+            reg[ram[pc + 1]] = ram[pc + 2]; pc += 3; DISPATCH();
+    L_prn:  printf("%u\n", reg[ram[pc + 1]]); pc += 2; DISPATCH();
+    L_add:  a = ram[pc + 1];
+            reg[a] = (reg[a] + reg[ram[pc + 2]]) & 0xFF;
+            pc += 3; DISPATCH();
+    L_mult: a = ram[pc + 1];
+            reg[a] = (reg[a] * reg[ram[pc + 2]]) & 0xFF;
+            pc += 3; DISPATCH();
+    L_cmp:  a = reg[ram[pc + 1]]; b = reg[ram[pc + 2]];
+            fl = (a == b) | ((a > b) << 1) | ((a < b) << 2);
+            pc += 3; DISPATCH();
+    L_and:  reg[ram[pc + 1]] &= reg[ram[pc + 2]]; pc += 3; DISPATCH();
+    L_or:   reg[ram[pc + 1]] |= reg[ram[pc + 2]]; pc += 3; DISPATCH();
+    L_xor:  reg[ram[pc + 1]] ^= reg[ram[pc + 2]]; pc += 3; DISPATCH();
+    L_not:  a = ram[pc + 1]; reg[a] = ~reg[a] & 0xFF; pc += 2; DISPATCH();
+    L_shl:  a = ram[pc + 1];
+            reg[a] = (reg[a] << reg[ram[pc + 2]]) & 0xFF;
+            pc += 3; DISPATCH();
+    L_shr:  reg[ram[pc + 1]] >>= reg[ram[pc + 2]]; pc += 3; DISPATCH();
+    L_mod:  a = ram[pc + 1]; b = reg[ram[pc + 2]];
+            if (b == 0) return LS8_ERR_DIV;
+            reg[a] %= b; pc += 3; DISPATCH();
+    L_push: reg[7] -= 1; ram[reg[7]] = reg[ram[pc + 1]];
+            pc += 2; DISPATCH();
+    L_pop:  reg[ram[pc + 1]] = ram[reg[7]]; reg[7] += 1;
+            pc += 2; DISPATCH();
+    L_call: reg[7] -= 1; ram[reg[7]] = pc + 2;
+            pc = reg[ram[pc + 1]]; DISPATCH();
+    L_ret:  pc = ram[reg[7]]; reg[7] += 1; DISPATCH();
+    L_jmp:  pc = reg[ram[pc + 1]]; DISPATCH();
+    L_jeq:  if (fl & 1) pc = reg[ram[pc + 1]]; else pc += 2; DISPATCH();
+    L_jne:  if (!(fl & 1)) pc = reg[ram[pc + 1]]; else pc += 2; DISPATCH();
+    L_ldi2: reg[ram[pc + 1]] = ram[pc + 2];
+            reg[ram[pc + 4]] = ram[pc + 5];
+            pc += 6; DISPATCH();
+    L_push2:
+            reg[7] -= 1; ram[reg[7]] = reg[ram[pc + 1]];
+            reg[7] -= 1; ram[reg[7]] = reg[ram[pc + 3]];
+            pc += 4; DISPATCH();
+    L_cmpjeq:
+            a = reg[ram[pc + 1]]; b = reg[ram[pc + 2]];
+            fl = (a == b) | ((a > b) << 1) | ((a < b) << 2);
+            if (fl & 1) pc = reg[ram[pc + 4]]; else pc += 5;
+            DISPATCH();
+    L_cmpjne:
+            a = reg[ram[pc + 1]]; b = reg[ram[pc + 2]];
+            fl = (a == b) | ((a > b) << 1) | ((a < b) << 2);
+            if (!(fl & 1)) pc = reg[ram[pc + 4]]; else pc += 5;
+            DISPATCH();
+    L_illegal:
+            printf("Unknown instruction: %u\n", ram[pc]);
+            return LS8_ERR_OPCODE;
+        #undef DISPATCH
+    #else  /* switch-threaded fallback (e.g. MSVC) */
+        for (;;) {
+            switch (ram[pc]) {
+            case OP_HALT: return LS8_OK;
+            case OP_NOP:  pc += 1; break;
+            case OP_LDI:  reg[ram[pc + 1]] = ram[pc + 2]; pc += 3; break;
+            case OP_PRN:  printf("%u\n", reg[ram[pc + 1]]); pc += 2; break;
+            case OP_ADD:  a = ram[pc + 1];
+                          reg[a] = (reg[a] + reg[ram[pc + 2]]) & 0xFF;
+                          pc += 3; break;
+            case OP_MULT: a = ram[pc + 1];
+                          reg[a] = (reg[a] * reg[ram[pc + 2]]) & 0xFF;
+                          pc += 3; break;
+            case OP_CMP:  a = reg[ram[pc + 1]]; b = reg[ram[pc + 2]];
+                          fl = (a == b) | ((a > b) << 1) | ((a < b) << 2);
+                          pc += 3; break;
+            case OP_AND:  reg[ram[pc + 1]] &= reg[ram[pc + 2]]; pc += 3; break;
+            case OP_OR:   reg[ram[pc + 1]] |= reg[ram[pc + 2]]; pc += 3; break;
+            case OP_XOR:  reg[ram[pc + 1]] ^= reg[ram[pc + 2]]; pc += 3; break;
+            case OP_NOT:  a = ram[pc + 1]; reg[a] = ~reg[a] & 0xFF;
+                          pc += 2; break;
+            case OP_SHL:  a = ram[pc + 1];
+                          reg[a] = (reg[a] << reg[ram[pc + 2]]) & 0xFF;
+                          pc += 3; break;
+            case OP_SHR:  reg[ram[pc + 1]] >>= reg[ram[pc + 2]]; pc += 3; break;
+            case OP_MOD:  a = ram[pc + 1]; b = reg[ram[pc + 2]];
+                          if (b == 0) return LS8_ERR_DIV;
+                          reg[a] %= b; pc += 3; break;
+            case OP_PUSH: reg[7] -= 1; ram[reg[7]] = reg[ram[pc + 1]];
+                          pc += 2; break;
+            case OP_POP:  reg[ram[pc + 1]] = ram[reg[7]]; reg[7] += 1;
+                          pc += 2; break;
+            case OP_CALL: reg[7] -= 1; ram[reg[7]] = pc + 2;
+                          pc = reg[ram[pc + 1]]; break;
+            case OP_RET:  pc = ram[reg[7]]; reg[7] += 1; break;
+            case OP_JMP:  pc = reg[ram[pc + 1]]; break;
+            case OP_JEQ:  if (fl & 1) pc = reg[ram[pc + 1]];
+                          else pc += 2; break;
+            case OP_JNE:  if (!(fl & 1)) pc = reg[ram[pc + 1]];
+                          else pc += 2; break;
+            case OP_LDI_LDI:
+                          reg[ram[pc + 1]] = ram[pc + 2];
+                          reg[ram[pc + 4]] = ram[pc + 5];
+                          pc += 6; break;
+            case OP_PUSH_PUSH:
+                          reg[7] -= 1; ram[reg[7]] = reg[ram[pc + 1]];
+                          reg[7] -= 1; ram[reg[7]] = reg[ram[pc + 3]];
+                          pc += 4; break;
+            case OP_CMP_JEQ:
+                          a = reg[ram[pc + 1]]; b = reg[ram[pc + 2]];
+                          fl = (a == b) | ((a > b) << 1) | ((a < b) << 2);
+                          if (fl & 1) pc = reg[ram[pc + 4]];
+                          else pc += 5; break;
+            case OP_CMP_JNE:
+                          a = reg[ram[pc + 1]]; b = reg[ram[pc + 2]];
+                          fl = (a == b) | ((a > b) << 1) | ((a < b) << 2);
+                          if (!(fl & 1)) pc = reg[ram[pc + 4]];
+                          else pc += 5; break;
+            default:
+                printf("Unknown instruction: %u\n", ram[pc]);
+                return LS8_ERR_OPCODE;
+            }
+        }
+    #endif
+    }
+    """
+    int ls8_run(unsigned char *ram, unsigned int *reg)
+    int LS8_ERR_DIV
+    int LS8_ERR_OPCODE
+
+
+def run_core(unsigned char[::1] ram, unsigned int[::1] reg):
+    """Run the program loaded in ram until HALT.
+
+    Failures surface exactly like the Python interpreter's: division by
+    zero raises, an unknown opcode exits with status 1 after the printed
+    message.
+    """
+    cdef int status = ls8_run(&ram[0], &reg[0])
+    if status == LS8_ERR_DIV:
+        raise Exception("Unsupported ALU operation - division by zero")
+    if status == LS8_ERR_OPCODE:
+        raise SystemExit(1)
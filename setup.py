@@ -0,0 +1,12 @@
+"""Build script for the optional Cython interpreter core.
+
+Usage: python setup.py build_ext --inplace
+"""
+
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name='ls8-cpu-core',
+    ext_modules=cythonize('cpu_core.pyx'),
+)